@@ -0,0 +1,97 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import google.generativeai as genai
+import streamlit as st
+
+MODEL_NAME = 'gemini-1.5-flash'  # Free model
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 120
+
+class TTLCache:
+    """Small thread-safe LRU cache whose entries expire after ttl seconds"""
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+def quantize(value, step):
+    """Round value to the nearest multiple of step; NaN and inf pass through"""
+    if not math.isfinite(value):
+        return value
+    return round(value / step) * step
+
+def quantize_price(price):
+    """Round a price to three significant digits so nearby prices share a prompt"""
+    if not math.isfinite(price) or price <= 0:
+        return price
+    step = max(10 ** (math.floor(math.log10(price)) - 2), 0.01)
+    return quantize(price, step)
+
+# Shared by every CachedGemini so cached answers survive Streamlit reruns
+_RESPONSES = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+
+class CachedGemini:
+    """Wraps a Gemini model so identical prompts within the TTL skip the API call"""
+    def __init__(self, model, cache=_RESPONSES, pool=_POOL):
+        self.model = model
+        self._cache = cache
+        self._pool = pool
+
+    def _key(self, prompt):
+        name = getattr(self.model, 'model_name', '')
+        return hashlib.blake2b(f"{name}\0{prompt}".encode(), digest_size=16).digest()
+
+    def _generate(self, key, prompt):
+        response = self.model.generate_content(prompt)
+        self._cache.set(key, response)
+        return response
+
+    def submit(self, prompt):
+        """Start generating in the background; returns a Future of the response"""
+        key = self._key(prompt)
+        cached = self._cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        return self._pool.submit(self._generate, key, prompt)
+
+    def generate_content(self, prompt):
+        """Drop-in for GenerativeModel.generate_content with response caching"""
+        key = self._key(prompt)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        return self._generate(key, prompt)
+
+@st.cache_resource
+def get_model():
+    """Configure Gemini once per process and share the cached model across reruns"""
+    genai.configure(api_key=os.environ.get("GEMINI_API_KEY", "YOUR_API_KEY_HERE"))
+    return CachedGemini(genai.GenerativeModel(MODEL_NAME))
@@ -1,10 +1,9 @@
 import streamlit as st
-import google.generativeai as genai
+from ai_client import get_model
 import os
 
 # Configure Gemini (free tier)
-genai.configure(api_key="YOUR_API_KEY_HERE")
-model = genai.GenerativeModel('gemini-1.5-flash')  # Free model
+model = get_model()
 
 st.title("🤖 My Trading Bot Assistant")
 
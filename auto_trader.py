@@ -1,55 +1,125 @@
+import re
 import time
+from collections import deque
 import streamlit as st
-from market_data import get_crypto_data, calculate_simple_signals
+from market_data import get_crypto_data, IncrementalSignals
 from paper_trader import PaperTrader
 import google.generativeai as genai
+from ai_client import CachedGemini, quantize, quantize_price
+
+_ANALYSIS_PROMPT = (
+    "Analyze this trading situation:\n"
+    "- Symbol: {symbol}\n"
+    "- Current Price: ${price:.2f}\n"
+    "- Technical Signal: {signal}\n"
+    "- RSI: {rsi:.1f}\n"
+    "- Available Cash: ${balance:.2f}\n"
+    "- Current Position: {position}\n"
+    "\n"
+    "Should I BUY, SELL, or HOLD? Give a one-word answer followed by reasoning.\n"
+    "Consider risk management and position sizing.\n"
+)
+
+# The prompt asks for a one-word answer first; skip leading markdown like "**"
+_ACTION_RE = re.compile(r'^[\W_]*(BUY|SELL|HOLD)\b', re.IGNORECASE)
+
+TRADE_LOG_SIZE = 5000
+# The previous tick's features are only used to prompt ahead this long after they were fetched
+SPECULATIVE_MAX_AGE = 60
 
 class AutoTrader:
     def __init__(self, trader, model):
         self.trader = trader
-        self.model = model
+        # submit() runs prompts on the shared background pool; plain models get wrapped
+        self.model = model if isinstance(model, CachedGemini) else CachedGemini(model)
         self.is_running = False
-        self.trade_log = []
+        # Bounded: the UI only shows the tail
+        self.trade_log = deque(maxlen=TRADE_LOG_SIZE)
+        self._signals = {}
+        # (fetch time, features) of the previous tick per symbol, used to prompt while
+        # fresh data loads
+        self._last_signals = {}
+    
+    def _refresh_signals(self, symbol):
+        """Update the symbol's indicator state from the newest candles, seeding it on first use"""
+        recent = get_crypto_data(symbol, "5d")
+        if recent is None or recent.empty:
+            return None
+        
+        state = self._signals.get(symbol)
+        if state is None or recent.index[0] > state.bar:
+            # First call, or the recent candles start after the state: reseed from history
+            history = get_crypto_data(symbol, "3mo")
+            if history is None or history.empty:
+                return None
+            state = IncrementalSignals(history)
+            if state.live_close is None or recent.index[0] > state.bar:
+                return None  # no finite closes, or a gap the history can't bridge
+            self._signals[symbol] = state
+        
+        # The history is cached far longer than the recent candles, so always catch
+        # up to them; candles older than the state's newest are ignored
+        state.update(recent)
+        return state.signals()
+    
+    def _analysis_prompt(self, symbol, signals):
+        """Fill the analysis template from a signals dict and the current portfolio.
+
+        Numbers are coarsened (price to 3 significant digits, RSI to 5, cash to $10)
+        so a near-stationary market repeats the same prompt and hits the response cache.
+        """
+        return _ANALYSIS_PROMPT.format(
+            symbol=symbol,
+            price=quantize_price(signals['Close']),
+            signal=signals['Signal'],
+            rsi=quantize(signals['RSI'], 5),
+            balance=quantize(self.trader.balance, 10),
+            position=self.trader.positions.get(symbol, 'None'),
+        )
     
     def analyze_and_trade(self, symbol):
         """Get AI analysis and execute trades if conditions met"""
         try:
-            # Get fresh market data
-            data = get_crypto_data(symbol, "1mo")
-            if data is None:
-                return "No data available"
-            
-            signals_data = calculate_simple_signals(data)
-            current_price = signals_data['Close'].iloc[-1]
-            current_signal = signals_data['Signal'].iloc[-1]
-            rsi = signals_data['RSI'].iloc[-1]
+            # While fresh market data is fetched here, the AI starts on the previous
+            # tick's features on the model's background pool, if they are recent
+            speculative_prompt = response_future = None
+            last = self._last_signals.get(symbol)
+            if last is not None and time.monotonic() - last[0] <= SPECULATIVE_MAX_AGE:
+                speculative_prompt = self._analysis_prompt(symbol, last[1])
+                response_future = self.model.submit(speculative_prompt)
             
-            # AI Analysis
-            analysis_prompt = f"""
-            Analyze this trading situation:
-            - Symbol: {symbol}
-            - Current Price: ${current_price:.2f}
-            - Technical Signal: {current_signal}
-            - RSI: {rsi:.1f}
-            - Available Cash: ${self.trader.balance:.2f}
-            - Current Position: {self.trader.positions.get(symbol, 'None')}
-            
-            Should I BUY, SELL, or HOLD? Give a one-word answer followed by reasoning.
-            Consider risk management and position sizing.
-            """
+            signals = self._refresh_signals(symbol)
+            if signals is None:
+                return "No data available"
+            self._last_signals[symbol] = (time.monotonic(), signals)
+            current_price = signals['Close']
             
-            response = self.model.generate_content(analysis_prompt)
-            ai_decision = response.text.strip()
+            # Only trade on an answer to the fresh data. Prompts are coarsened, so
+            # usually they match; otherwise the fresh prompt is often still cached.
+            prompt = self._analysis_prompt(symbol, signals)
+            response = None
+            if prompt == speculative_prompt:
+                try:
+                    response = response_future.result()
+                except Exception:
+                    pass  # e.g. a timeout or quota error: retry once synchronously below
+            elif response_future is not None:
+                response_future.cancel()
+            if response is None:
+                response = self.model.generate_content(prompt)
+            ai_decision = response.text
+            match = _ACTION_RE.match(ai_decision)
+            decision = match.group(1).upper() if match else 'HOLD'
             
             # Execute based on AI decision
             action_taken = "NONE"
-            if "BUY" in ai_decision.upper() and self.trader.balance > current_price * 0.01:
+            if decision == 'BUY' and self.trader.balance > current_price * 0.01:
                 # Buy 1% of balance worth
                 amount = (self.trader.balance * 0.01) / current_price
                 if self.trader.buy(symbol, amount, current_price):
                     action_taken = f"BOUGHT {amount:.4f} {symbol}"
             
-            elif "SELL" in ai_decision.upper() and symbol in self.trader.positions:
+            elif decision == 'SELL' and symbol in self.trader.positions:
                 # Sell 50% of position
                 amount = self.trader.positions[symbol]['amount'] * 0.5
                 if self.trader.sell(symbol, amount, current_price):
@@ -58,7 +128,7 @@ class AutoTrader:
             log_entry = {
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
                 'price': current_price,
-                'ai_analysis': ai_decision[:100],
+                'ai_analysis': ai_decision.lstrip().partition('\n')[0][:100],
                 'action': action_taken,
                 'balance': self.trader.balance
             }
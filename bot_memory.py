@@ -1,40 +1,113 @@
 import json
+import re
+import sqlite3
 import streamlit as st
 from datetime import datetime
 
+# Oldest rows beyond this are pruned so a long session stays bounded
+MAX_ROWS = 5000
+
+# Word characters in any script, so query tokens line up with FTS5's unicode61 tokenizer
+_TOKEN_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS conv USING fts5(user_input, ai_response, meta UNINDEXED);
+CREATE TABLE IF NOT EXISTS trades(ts TEXT, action TEXT, symbol TEXT, amount REAL, price REAL, result REAL);
+"""
+
+def _tokenize(text):
+    """Lowercase word tokens, deduplicated"""
+    return set(_TOKEN_RE.findall(text.lower()))
+
 class BotMemory:
-    def __init__(self):
-        self.conversation_history = []
+    def __init__(self, db_path=":memory:"):
+        # Conversations live in an FTS5 table and trades in a plain table, so
+        # memory stays bounded and a file-backed db_path survives restarts
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
         self.trading_patterns = {}
         self.user_preferences = {}
-    
+        self._snap_key = None
+        self._snap = {}
+
+    @property
+    def conversation_history(self):
+        """All stored conversations, oldest first"""
+        rows = self._db.execute("SELECT user_input, ai_response, meta FROM conv ORDER BY rowid")
+        return [self._entry(*row) for row in rows]
+
     def add_conversation(self, user_input, ai_response, market_context):
         """Store conversation with market context"""
-        memory_entry = {
+        meta = {
             'timestamp': datetime.now().isoformat(),
-            'user_input': user_input,
-            'ai_response': ai_response,
             'market_context': market_context,
             'portfolio_state': self.get_portfolio_snapshot()
         }
-        self.conversation_history.append(memory_entry)
-    
+        with self._db:
+            self._db.execute("INSERT INTO conv (user_input, ai_response, meta) VALUES (?, ?, ?)",
+                             (user_input, ai_response, json.dumps(meta, default=str)))
+            self._prune('conv')
+
     def get_relevant_context(self, current_query, limit=5):
         """Retrieve relevant past conversations"""
-        # Simple keyword matching (can be enhanced)
-        relevant = []
-        for entry in self.conversation_history[-20:]:
-            if any(word in entry['user_input'].lower()
-                   for word in current_query.lower().split()):
-                relevant.append(entry)
-        return relevant[-limit:]
+        tokens = _tokenize(current_query)
+        if not tokens:
+            return []
+        # Quote every token so user text can't be parsed as FTS query syntax
+        match = "user_input : (" + " OR ".join(f'"{token}"' for token in tokens) + ")"
+        rows = self._db.execute(
+            "SELECT rowid, user_input, ai_response, meta FROM conv "
+            "WHERE conv MATCH ? ORDER BY rank LIMIT ?", (match, limit)).fetchall()
+        # Best-ranked matches, returned in chronological order
+        return [self._entry(*row[1:]) for row in sorted(rows)]
+
+    def add_trade_outcome(self, action, symbol, amount, price, result):
+        """Record a closed trade and its profit/loss"""
+        with self._db:
+            self._db.execute("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)",
+                             (datetime.now().isoformat(), action, symbol, amount, price, result))
+            self._prune('trades')
+
+    def summarize_performance(self):
+        """Aggregate recorded trade outcomes in a single query"""
+        count, total, wins = self._db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(result), 0), COALESCE(SUM(result > 0), 0) FROM trades").fetchone()
+        return {
+            'trades': count,
+            'total_result': total,
+            'wins': wins,
+            'win_rate': wins / count if count else 0.0
+        }
+
+    def _prune(self, table):
+        """Drop the oldest rows of table beyond MAX_ROWS"""
+        self._db.execute(f"DELETE FROM {table} WHERE rowid <= (SELECT MAX(rowid) FROM {table}) - ?",
+                         (MAX_ROWS,))
+
+    def _entry(self, user_input, ai_response, meta):
+        meta = json.loads(meta)
+        return {
+            'timestamp': meta['timestamp'],
+            'user_input': user_input,
+            'ai_response': ai_response,
+            'market_context': meta['market_context'],
+            'portfolio_state': meta['portfolio_state']
+        }
 
     def get_portfolio_snapshot(self):
-        """Return a basic snapshot of the current portfolio."""
+        """Return a basic snapshot of the current portfolio.
+
+        The snapshot is rebuilt only after the trader executes a trade; callers
+        share the returned dict and must not mutate it.
+        """
         trader = st.session_state.get('trader')
         if trader is None:
             return {}
-        return {
-            'balance': trader.balance,
-            'positions': trader.positions.copy()
-        }
+        key = (id(trader), trader._rev)
+        if key != self._snap_key:
+            self._snap = {
+                'balance': trader.balance,
+                'positions': trader.positions
+            }
+            self._snap_key = key
+        return self._snap
@@ -0,0 +1,47 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+from market_data import get_crypto_data, calculate_simple_signals
+
+CHART_TTL = 60
+
+# Figures are cached per (symbol, period) so repeated button presses skip
+# rebuilding and re-serializing the traces. Prices go out as float32 to halve
+# the payload sent to the browser.
+
+@st.cache_data(ttl=CHART_TTL, show_spinner=False)
+def build_candle_figure(symbol, period):
+    """Candlestick chart with SMA 20/50 overlays, or None without data"""
+    data = get_crypto_data(symbol, period)
+    if data is None:
+        return None
+    signals = calculate_simple_signals(data)
+    ohlc = data[['Open', 'High', 'Low', 'Close']].astype(np.float32)
+
+    fig = go.Figure()
+    fig.add_trace(go.Candlestick(x=data.index,
+                                 open=ohlc['Open'],
+                                 high=ohlc['High'],
+                                 low=ohlc['Low'],
+                                 close=ohlc['Close'],
+                                 name="Price"))
+    fig.add_trace(go.Scatter(x=data.index, y=signals['SMA_20'],
+                             name="SMA 20", line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=data.index, y=signals['SMA_50'],
+                             name="SMA 50", line=dict(color='red')))
+    return fig
+
+@st.cache_data(ttl=CHART_TTL, show_spinner=False)
+def build_price_figure(symbol, period):
+    """Close-price line with an SMA 20 overlay, or None without data"""
+    data = get_crypto_data(symbol, period)
+    if data is None:
+        return None
+    signals = calculate_simple_signals(data)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=data.index, y=data['Close'].astype(np.float32),
+                             name="Price", line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=data.index, y=signals['SMA_20'],
+                             name="SMA 20", line=dict(color='orange')))
+    return fig
@@ -1,11 +1,10 @@
 import streamlit as st
-import google.generativeai as genai
-import plotly.graph_objects as go
-from market_data import get_crypto_data, calculate_simple_signals
+from ai_client import get_model
+from charts import build_candle_figure
+from market_data import get_crypto_data, calculate_simple_signals, latest_signals
 
 # Configure AI
-genai.configure(api_key="YOUR_API_KEY_HERE")
-model = genai.GenerativeModel('gemini-1.5-flash')
+model = get_model()
 
 st.title("🚀 Smart Trading Bot - Free Version")
 
@@ -19,26 +18,12 @@ if st.sidebar.button("Get Market Data"):
     with st.spinner("Fetching free market data..."):
         data = get_crypto_data(crypto, period)
         if data is not None:
-            data_with_signals = calculate_simple_signals(data)
-            
-            # Create chart
-            fig = go.Figure()
-            fig.add_trace(go.Candlestick(x=data.index,
-                                       open=data['Open'],
-                                       high=data['High'],
-                                       low=data['Low'],
-                                       close=data['Close'],
-                                       name="Price"))
-            fig.add_trace(go.Scatter(x=data.index, y=data_with_signals['SMA_20'], 
-                                   name="SMA 20", line=dict(color='blue')))
-            fig.add_trace(go.Scatter(x=data.index, y=data_with_signals['SMA_50'], 
-                                   name="SMA 50", line=dict(color='red')))
-            
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(build_candle_figure(crypto, period), use_container_width=True)
             
             # Show latest signal
-            latest_signal = data_with_signals['Signal'].iloc[-1]
-            latest_price = data_with_signals['Close'].iloc[-1]
+            latest = latest_signals(data)
+            latest_signal = latest['Signal']
+            latest_price = latest['Close']
             
             st.metric("Current Price", f"${latest_price:.2f}")
             st.metric("Signal", latest_signal)
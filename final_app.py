@@ -1,19 +1,19 @@
 import streamlit as st
-import google.generativeai as genai
+from ai_client import get_model
 import time
 import pandas as pd
-from market_data import get_crypto_data, calculate_simple_signals
+from charts import build_price_figure
+from market_data import get_crypto_data, get_latest_prices, latest_signals
 from paper_trader import PaperTrader
 from auto_trader import AutoTrader
 from bot_memory import BotMemory
-from trading_rag import TradingRAG
+from trading_rag import get_trading_rag
 
 # Page config
 st.set_page_config(page_title="Free AI Trading Bot", layout="wide")
 
 # Initialize
-genai.configure(api_key="YOUR_API_KEY_HERE")
-model = genai.GenerativeModel('gemini-1.5-flash')
+model = get_model()
 
 if 'trader' not in st.session_state:
     st.session_state.trader = PaperTrader(10000)
@@ -22,7 +22,7 @@ if 'auto_trader' not in st.session_state:
 if 'bot_memory' not in st.session_state:
     st.session_state.bot_memory = BotMemory()
 if 'trading_rag' not in st.session_state:
-    st.session_state.trading_rag = TradingRAG()
+    st.session_state.trading_rag = get_trading_rag()
 
 st.title("🤖 Complete Free AI Trading Bot")
 
@@ -33,10 +33,9 @@ with col1:
     st.subheader("Portfolio")
     
     # Current stats
-    data = get_crypto_data("BTC-USD", "1d")
-    if data is not None:
-        current_price = data['Close'].iloc[-1]
-        portfolio_value = st.session_state.trader.get_portfolio_value({"BTC-USD": current_price})
+    prices = get_latest_prices(["BTC-USD", *st.session_state.trader.positions])
+    if prices:
+        portfolio_value = st.session_state.trader.get_portfolio_value(prices)
         profit_loss = portfolio_value - 10000
         
         st.metric("Total Value", f"${portfolio_value:.2f}")
@@ -52,7 +51,7 @@ with col1:
     
     if st.button("📊 View Auto Log"):
         if st.session_state.auto_trader.trade_log:
-            log_df = pd.DataFrame(st.session_state.auto_trader.trade_log)
+            log_df = pd.DataFrame(list(st.session_state.auto_trader.trade_log))
             st.dataframe(log_df.tail(5))
 
 with col2:
@@ -65,23 +64,17 @@ with col2:
         with st.spinner("Getting AI analysis..."):
             data = get_crypto_data(crypto, "1mo")
             if data is not None:
-                signals_data = calculate_simple_signals(data)
+                signals = latest_signals(data)
                 
                 # Show chart
-                import plotly.graph_objects as go
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(x=data.index, y=data['Close'], 
-                                       name="Price", line=dict(color='blue')))
-                fig.add_trace(go.Scatter(x=data.index, y=signals_data['SMA_20'], 
-                                       name="SMA 20", line=dict(color='orange')))
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(build_price_figure(crypto, "1mo"), use_container_width=True)
                 
                 # AI Analysis
                 analysis_prompt = f"""
                 Analyze {crypto} for a beginner trader:
-                Current Price: ${signals_data['Close'].iloc[-1]:.2f}
-                RSI: {signals_data['RSI'].iloc[-1]:.1f}
-                Signal: {signals_data['Signal'].iloc[-1]}
+                Current Price: ${signals['Close']:.2f}
+                RSI: {signals['RSI']:.1f}
+                Signal: {signals['Signal']}
                 
                 Provide simple, actionable advice in 3 sentences.
                 """
@@ -89,7 +82,23 @@ with col2:
                 response = model.generate_content(analysis_prompt)
                 st.info(response.text)
 
-        
+
+_ENHANCED_PROMPT = (
+    "TRADING KNOWLEDGE CONTEXT:\n"
+    "{knowledge}\n"
+    "\n"
+    "CONVERSATION HISTORY:\n"
+    "{history}\n"
+    "\n"
+    "CURRENT MARKET DATA:\n"
+    "{market}\n"
+    "\n"
+    "CURRENT USER QUESTION: {question}\n"
+    "\n"
+    "Provide a comprehensive answer using the knowledge base and conversation history.\n"
+    "Reference previous discussions when relevant.\n"
+)
+
 def enhanced_ai_response(user_input, current_market_data):
     """AI response with memory and RAG"""
     
@@ -100,21 +109,12 @@ def enhanced_ai_response(user_input, current_market_data):
     knowledge_context = st.session_state.trading_rag.retrieve_relevant_info(user_input)
     
     # 3. Build enhanced prompt
-    enhanced_prompt = f"""
-    TRADING KNOWLEDGE CONTEXT:
-    {chr(10).join([f"- {doc['topic']}: {doc['content'][:200]}..." for doc in knowledge_context])}
-    
-    CONVERSATION HISTORY:
-    {chr(10).join([f"Previous: {conv['user_input']} -> {conv['ai_response'][:100]}..." for conv in conversation_context])}
-    
-    CURRENT MARKET DATA:
-    {current_market_data}
-    
-    CURRENT USER QUESTION: {user_input}
-    
-    Provide a comprehensive answer using the knowledge base and conversation history.
-    Reference previous discussions when relevant.
-    """
+    enhanced_prompt = _ENHANCED_PROMPT.format(
+        knowledge="\n".join(f"- {doc.topic}: {doc.content[:200]}..." for doc in knowledge_context),
+        history="\n".join(f"Previous: {conv['user_input']} -> {conv['ai_response'][:100]}..." for conv in conversation_context),
+        market=current_market_data,
+        question=user_input,
+    )
     
     response = model.generate_content(enhanced_prompt)
     
@@ -147,10 +147,10 @@ with col3:
         # Get current market data
         data = get_crypto_data("BTC-USD", "1mo")
         if data is not None:
-            signals_data = calculate_simple_signals(data)
-            current_price = signals_data['Close'].iloc[-1]
-            current_signal = signals_data['Signal'].iloc[-1]
-            current_rsi = signals_data['RSI'].iloc[-1]
+            signals = latest_signals(data)
+            current_price = signals['Close']
+            current_signal = signals['Signal']
+            current_rsi = signals['RSI']
         
             current_market_context = f"""
             Current BTC-USD Price: ${current_price:.2f}
@@ -1,33 +1,262 @@
+import functools
+import time
+from collections import deque
+import numpy as np
+import requests
 import yfinance as yf
 import pandas as pd
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from numba import njit
+except ImportError:  # optional: only speeds up RSI on long backtest series
+    njit = None
+
+# Cache lifetime per history period: short periods move fast, long ones barely change
+CACHE_TTL_SECONDS = {"1d": 30, "5d": 60, "1mo": 300, "3mo": 900, "6mo": 1800, "1y": 3600}
+DEFAULT_CACHE_TTL = 60
+LATEST_PRICES_TTL = 5
+
+RSI_PERIOD = 14
+SIGNALS = ['BUY', 'SELL', 'HOLD']
+# Series longer than this use the Numba RSI kernel when numba is installed
+NUMBA_MIN_LENGTH = 2000
+# Wilder smoothing has infinite memory; this many closes leave < 1e-4 of the seed
+SIGNAL_TAIL = 150
+
+def _build_session():
+    """One keep-alive session so Yahoo requests reuse warm TLS connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                          max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount('https://', adapter)
+    session.headers.update({'Connection': 'keep-alive'})
+    return session
+
+_SESSION = _build_session()
+
+@functools.lru_cache(maxsize=64)
+def _fetch(symbol, period, bucket):
+    """Download history once per (symbol, period, TTL bucket)"""
+    ticker = yf.Ticker(symbol, session=_SESSION)
+    return ticker.history(period=period)
 
 def get_crypto_data(symbol="BTC-USD", period="1mo"):
-    """Get free crypto data from Yahoo Finance"""
+    """Get free crypto data from Yahoo Finance (cached per period TTL).
+
+    The returned frame is shared with the cache; treat it as read-only.
+    """
     try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period=period)
-        return data
+        ttl = CACHE_TTL_SECONDS.get(period, DEFAULT_CACHE_TTL)
+        bucket = int(time.time() // ttl)
+        return _fetch(symbol, period, bucket)
     except Exception as e:
         st.error(f"Error getting data: {e}")
         return None
 
+@functools.lru_cache(maxsize=16)
+def _fetch_latest(symbols, bucket):
+    """Batch-download the latest 1m close for several symbols in one request"""
+    data = yf.download(list(symbols), period='1d', interval='1m', threads=True,
+                       progress=False, session=_SESSION)
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(symbols[0])
+    return close.ffill().iloc[-1].dropna().to_dict()
+
+def get_latest_prices(symbols):
+    """Get current prices for several symbols with a single Yahoo Finance call.
+
+    Callers within the same few seconds share one batched fetch.
+    """
+    try:
+        key = tuple(sorted(set(symbols)))
+        bucket = int(time.time() // LATEST_PRICES_TTL)
+        return dict(_fetch_latest(key, bucket))
+    except Exception as e:
+        st.error(f"Error getting prices: {e}")
+        return None
+
 def calculate_simple_signals(data):
-    """Calculate basic trading signals"""
+    """Calculate basic trading signals on a copy of the Close column"""
+    out = data[['Close']].copy()
+
+    close = out['Close'].to_numpy(dtype=np.float64)
+
     # Simple Moving Averages (free indicators)
-    data['SMA_20'] = data['Close'].rolling(window=20).mean()
-    data['SMA_50'] = data['Close'].rolling(window=50).mean()
+    sma_20 = _sma(close, 20)
+    sma_50 = _sma(close, 50)
     
     # RSI (free indicator)
-    delta = data['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    data['RSI'] = 100 - (100 / (1 + rs))
+    rsi = _wilder_rsi(close)
     
-    # Simple Buy/Sell signals
-    data['Signal'] = 'HOLD'
-    data.loc[(data['SMA_20'] > data['SMA_50']) & (data['RSI'] < 70), 'Signal'] = 'BUY'
-    data.loc[(data['SMA_20'] < data['SMA_50']) & (data['RSI'] > 30), 'Signal'] = 'SELL'
+    # Indicator columns are stored as float32: charts and prompts show a few
+    # digits at most, and it halves their memory. Signals use the float64 values.
+    out['SMA_20'] = sma_20.astype(np.float32)
+    out['SMA_50'] = sma_50.astype(np.float32)
+    out['RSI'] = rsi.astype(np.float32)
     
-    return data
\ No newline at end of file
+    # Simple Buy/Sell signals, stored as a categorical (1 byte per row)
+    conditions = [(sma_20 > sma_50) & (rsi < 70), (sma_20 < sma_50) & (rsi > 30)]
+    out['Signal'] = pd.Categorical(np.select(conditions, ['BUY', 'SELL'], default='HOLD'),
+                                   categories=SIGNALS)
+    
+    return out
+
+def _sma(close, window):
+    """Simple moving average from a cumulative sum, NaN until the window fills.
+
+    Like rolling().mean(), a NaN close only blanks the windows that contain it.
+    """
+    out = np.full(close.shape, np.nan)
+    missing = np.isnan(close)
+    csum = np.cumsum(np.insert(np.where(missing, 0.0, close), 0, 0.0))
+    gaps = np.cumsum(np.insert(missing, 0, False))
+    means = (csum[window:] - csum[:-window]) / window
+    out[window - 1:] = np.where(gaps[window:] - gaps[:-window] > 0, np.nan, means)
+    return out
+
+def _wilder_rsi_loop(close, period):
+    """Single-pass Wilder's RSI with the same seeding as the ewm version below"""
+    out = np.full(close.size, np.nan)
+    avg_gain = avg_loss = 0.0
+    for i in range(1, close.size):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if i == 1:
+            avg_gain, avg_loss = gain, loss
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        if i >= period:
+            out[i] = 100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+    return out
+
+_wilder_rsi_jit = njit(cache=True)(_wilder_rsi_loop) if njit is not None else None
+
+def _wilder_rsi(close, period=RSI_PERIOD):
+    """Wilder's RSI: gains/losses smoothed with an RMA (alpha = 1/period)"""
+    if _wilder_rsi_jit is not None and close.size > NUMBA_MIN_LENGTH:
+        return _wilder_rsi_jit(close, period)
+
+    delta = np.diff(close)
+    gain = pd.Series(np.where(delta > 0, delta, 0.0))
+    loss = pd.Series(np.where(delta < 0, -delta, 0.0))
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    rsi[avg_loss == 0] = 100.0
+
+    out = np.full(close.shape, np.nan)
+    out[1:] = rsi
+    return out
+
+def latest_signals(data):
+    """Calculate signals for the last candle only, from the tail of the series"""
+    close = data['Close'].iloc[-SIGNAL_TAIL:].to_numpy(dtype=np.float64)
+    sma_20 = close[-20:].mean() if close.size >= 20 else np.nan
+    sma_50 = close[-50:].mean() if close.size >= 50 else np.nan
+    rsi = _wilder_rsi(close)[-1]
+    return _signal_row(close[-1], sma_20, sma_50, rsi)
+
+def _signal_row(close, sma_20, sma_50, rsi):
+    """Build the last-row signal dict shared by latest_signals and IncrementalSignals"""
+    signal = 'HOLD'
+    if sma_20 > sma_50 and rsi < 70:
+        signal = 'BUY'
+    elif sma_20 < sma_50 and rsi > 30:
+        signal = 'SELL'
+
+    return {
+        'Close': float(close),
+        'SMA_20': float(sma_20),
+        'SMA_50': float(sma_50),
+        'RSI': float(rsi),
+        'Signal': signal,
+    }
+
+class IncrementalSignals:
+    """Running SMA/RSI state updated one candle at a time.
+
+    Completed candles are folded into the Wilder averages and SMA window sums;
+    the newest (possibly still forming) candle is applied on top when reading
+    signals, so re-fetching an updated candle never double counts it.
+    """
+    SMA_WINDOWS = (20, 50)
+
+    def __init__(self, data):
+        self.bar = None
+        self.live_close = None
+        self.last_close = None
+        self.deltas = 0
+        self.avg_gain = None
+        self.avg_loss = None
+        self.windows = {w: deque(maxlen=w - 1) for w in self.SMA_WINDOWS}
+        self.sums = {w: 0.0 for w in self.SMA_WINDOWS}
+
+        for ts, close in data['Close'].items():
+            self._push(ts, close)
+
+    def update(self, data):
+        """Apply the newest candles; returns False if they don't reach back to the last seen one"""
+        closes = data['Close']
+        newer = closes[closes.index >= self.bar]
+        if newer.empty or newer.index[0] != self.bar:
+            return False
+        for ts, close in newer.items():
+            self._push(ts, close)
+        return True
+
+    def signals(self):
+        """Signals for the newest candle, same keys as latest_signals"""
+        close = self.live_close
+        sma = {}
+        for w in self.SMA_WINDOWS:
+            window = self.windows[w]
+            sma[w] = (self.sums[w] + close) / w if len(window) == w - 1 else np.nan
+
+        rsi = np.nan
+        if self.last_close is not None and self.deltas + 1 >= RSI_PERIOD:
+            avg_gain, avg_loss = self._smooth(close - self.last_close)
+            rsi = 100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+
+        return _signal_row(close, sma[20], sma[50], rsi)
+
+    def _push(self, ts, close):
+        # Yahoo sometimes reports a NaN close; folding it in would poison the sums
+        # and Wilder averages for good, so such candles are skipped
+        if not np.isfinite(close):
+            return
+        if ts != self.bar:
+            if self.bar is not None:
+                self._commit()
+            self.bar = ts
+        self.live_close = float(close)
+
+    def _commit(self):
+        """Fold the live candle into the running state once a newer one arrives"""
+        close = self.live_close
+        if self.last_close is not None:
+            self.avg_gain, self.avg_loss = self._smooth(close - self.last_close)
+            self.deltas += 1
+        for w in self.SMA_WINDOWS:
+            window = self.windows[w]
+            if len(window) == window.maxlen:
+                self.sums[w] -= window[0]
+            window.append(close)
+            self.sums[w] += close
+        self.last_close = close
+
+    def _smooth(self, delta):
+        """One step of Wilder's recurrence, matching ewm(adjust=False)"""
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+        if self.avg_gain is None:
+            return gain, loss
+        n = RSI_PERIOD
+        return (self.avg_gain * (n - 1) + gain) / n, (self.avg_loss * (n - 1) + loss) / n
@@ -1,28 +1,51 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from collections import deque
 from datetime import datetime
 import json
 
+TRADE_HISTORY_SIZE = 5000
+
 class PaperTrader:
     def __init__(self, initial_balance=10000):
         self.balance = initial_balance
-        self.positions = {}
-        self.trade_history = []
+        # Positions stored as parallel arrays: symbol i holds _amounts[i] at avg cost _costs[i]
+        self._symbols = []
+        self._sym_index = {}
+        self._amounts = np.zeros(0)
+        self._costs = np.zeros(0)
+        self.trade_history = deque(maxlen=TRADE_HISTORY_SIZE)
         self.initial_balance = initial_balance
+        # Bumped on every executed trade so readers can cache derived state
+        self._rev = 0
+    
+    @property
+    def positions(self):
+        """Open positions as {symbol: {'amount': ..., 'price': ...}} (a fresh dict)"""
+        return {
+            symbol: {'amount': float(amount), 'price': float(cost)}
+            for symbol, amount, cost in zip(self._symbols, self._amounts, self._costs)
+        }
     
     def buy(self, symbol, amount, price):
         """Execute paper buy order"""
         cost = amount * price
         if cost <= self.balance:
             self.balance -= cost
-            if symbol in self.positions:
+            i = self._sym_index.get(symbol)
+            if i is not None:
                 # Average down
-                total_amount = self.positions[symbol]['amount'] + amount
-                avg_price = ((self.positions[symbol]['amount'] * self.positions[symbol]['price']) + cost) / total_amount
-                self.positions[symbol] = {'amount': total_amount, 'price': avg_price}
+                total_amount = self._amounts[i] + amount
+                self._costs[i] = ((self._amounts[i] * self._costs[i]) + cost) / total_amount
+                self._amounts[i] = total_amount
             else:
-                self.positions[symbol] = {'amount': amount, 'price': price}
+                self._sym_index[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+                self._amounts = np.append(self._amounts, amount)
+                self._costs = np.append(self._costs, price)
             
+            self._rev += 1
             self.trade_history.append({
                 'timestamp': datetime.now(),
                 'action': 'BUY',
@@ -36,13 +59,15 @@ class PaperTrader:
     
     def sell(self, symbol, amount, price):
         """Execute paper sell order"""
-        if symbol in self.positions and self.positions[symbol]['amount'] >= amount:
+        i = self._sym_index.get(symbol)
+        if i is not None and self._amounts[i] >= amount:
             self.balance += amount * price
-            self.positions[symbol]['amount'] -= amount
+            self._amounts[i] -= amount
             
-            if self.positions[symbol]['amount'] == 0:
-                del self.positions[symbol]
+            if self._amounts[i] == 0:
+                self._remove_position(i)
             
+            self._rev += 1
             self.trade_history.append({
                 'timestamp': datetime.now(),
                 'action': 'SELL',
@@ -54,13 +79,19 @@ class PaperTrader:
             return True
         return False
     
+    def _remove_position(self, i):
+        """Drop a fully liquidated position and reindex the symbols after it"""
+        del self._symbols[i]
+        self._amounts = np.delete(self._amounts, i)
+        self._costs = np.delete(self._costs, i)
+        self._sym_index = {symbol: j for j, symbol in enumerate(self._symbols)}
+    
     def get_portfolio_value(self, current_prices):
         """Calculate total portfolio value"""
-        total_value = self.balance
-        for symbol, position in self.positions.items():
-            if symbol in current_prices:
-                total_value += position['amount'] * current_prices[symbol]
-        return total_value
+        # Symbols without a current price contribute nothing, as before
+        prices = np.fromiter((current_prices.get(symbol, 0.0) for symbol in self._symbols),
+                             dtype=np.float64, count=len(self._symbols))
+        return self.balance + float(self._amounts @ prices)
     
     def get_profit_loss(self, current_prices):
         """Calculate profit/loss"""
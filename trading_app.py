@@ -1,6 +1,7 @@
+import pandas as pd
 import streamlit as st
-import google.generativeai as genai
-from market_data import get_crypto_data, calculate_simple_signals
+from ai_client import get_model
+from market_data import get_crypto_data, get_latest_prices, calculate_simple_signals
 from paper_trader import PaperTrader
 import plotly.graph_objects as go
 
@@ -9,8 +10,7 @@ if 'trader' not in st.session_state:
     st.session_state.trader = PaperTrader(10000)
 
 # Configure AI
-genai.configure(api_key="YOUR_API_KEY_HERE")
-model = genai.GenerativeModel('gemini-1.5-flash')
+model = get_model()
 
 st.title("🎯 Complete Trading Bot - Paper Trading")
 
@@ -25,9 +25,10 @@ if data is not None:
     current_price = signals_data['Close'].iloc[-1]
     current_signal = signals_data['Signal'].iloc[-1]
     
-    # Portfolio display
-    portfolio_value = st.session_state.trader.get_portfolio_value({crypto: current_price})
-    profit_loss = st.session_state.trader.get_profit_loss({crypto: current_price})
+    # Portfolio display: price every held position, not just the selected crypto
+    prices = get_latest_prices([crypto, *st.session_state.trader.positions]) or {crypto: current_price}
+    portfolio_value = st.session_state.trader.get_portfolio_value(prices)
+    profit_loss = st.session_state.trader.get_profit_loss(prices)
     
     st.sidebar.metric("Portfolio Value", f"${portfolio_value:.2f}")
     st.sidebar.metric("Cash Balance", f"${st.session_state.trader.balance:.2f}")
@@ -95,5 +96,5 @@ if prompt := st.chat_input("Ask for trading advice or request trades..."):
 # Display trade history
 if st.session_state.trader.trade_history:
     st.subheader("Trade History")
-    trade_df = pd.DataFrame(st.session_state.trader.trade_history)
+    trade_df = pd.DataFrame(list(st.session_state.trader.trade_history))
     st.dataframe(trade_df.tail(10))
\ No newline at end of file
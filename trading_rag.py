@@ -1,13 +1,148 @@
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import functools
+import hashlib
+import threading
+from collections import namedtuple
+from pathlib import Path
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
+
+try:
+    import hnswlib
+except ImportError:  # optional: only used once the knowledge base is large
+    hnswlib = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: compiles the sparse scoring loop
+    njit = None
+
+QUERY_CACHE_SIZE = 1024
+# Fitted TF-IDF state is cached here, keyed by a hash of the knowledge base
+CACHE_DIR = Path.home() / '.cache' / 'trading_rag'
+# Hash buckets for terms; collisions are negligible at this size for a small corpus
+HASH_FEATURES = 2 ** 18
+
+# Below this many documents an exact scan is as fast as HNSW and never misses
+ANN_MIN_DOCS = 1000
+# HNSW search breadth; hnswlib widens it to k on its own when more hits are asked for
+ANN_EF = 32
+# Up to this size a dense float32 BLAS product beats sparse SpMV; memory is N*d*4 bytes
+DENSE_MAX_DOCS = 10_000
+DENSE_MAX_CELLS = 50_000_000
+
+# One retrieval result; immutable, so cached hits are handed out without copying
+Hit = namedtuple('Hit', ['topic', 'content', 'similarity'])
+
+def _accumulate_columns(indptr, indices, data, q_cols, q_weights, out):
+    """out[doc] += w * weight(doc, j) for every query term (j, w), straight off the CSC arrays"""
+    for k in range(q_cols.size):
+        j = q_cols[k]
+        w = q_weights[k]
+        for p in range(indptr[j], indptr[j + 1]):
+            out[indices[p]] += w * data[p]
+
+_accumulate_columns_jit = njit(cache=True)(_accumulate_columns) if njit is not None else None
+
+def _top_k(similarities, k):
+    """Indices of the k largest scores, best first, without sorting all of them"""
+    k = min(k, similarities.size)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    part = np.argpartition(-similarities, k - 1)[:k]
+    return part[np.argsort(-similarities[part])]
+
+def _quantize_int8(matrix):
+    """int8 copy of a non-negative sparse matrix plus the scale to undo it"""
+    peak = matrix.data.max() if matrix.nnz else 0.0
+    scale = 127.0 / peak if peak > 0 else 1.0
+    data = np.round(matrix.data * scale).astype(np.int8)
+    return sp.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape), scale
 
 class TradingRAG:
-    def __init__(self):
-        self.knowledge_base = self.load_trading_knowledge()
-        self.vectorizer = TfidfVectorizer(stop_words='english')
-        self.doc_vectors = self.vectorizer.fit_transform(self.knowledge_base['content'])
-    
+    def __init__(self, quantize=False):
+        # Parallel lists: document i is (topics[i], contents[i])
+        self.topics, self.contents = self.load_trading_knowledge()
+        # Object-array views of the same strings, for gathering hits by fancy indexing
+        self._topic_array = np.array(self.topics, dtype=object)
+        self._content_array = np.array(self.contents, dtype=object)
+        # Hashing tokenises in C with no vocabulary dict; only the buckets the corpus
+        # uses are kept as columns, so query terms outside it drop out before
+        # normalisation exactly as with a TfidfVectorizer vocabulary. float32 from
+        # the start: the 0.1 threshold doesn't need double precision and every
+        # scoring pass moves half the bytes
+        self.hasher = HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False,
+                                        norm=None, stop_words='english', dtype=np.float32)
+        self.tfidf, self.columns, self.doc_vectors = self._load_or_fit()
+        self.ann = self.build_ann_index() if hnswlib is not None and len(self.topics) >= ANN_MIN_DOCS else None
+        # Optional int8 copy of the rows: 1/8 the bytes per score pass, ~1% score error
+        self.doc_int8 = None
+        if quantize:
+            self.doc_int8, self.int8_scale = _quantize_int8(self.doc_vectors)
+        self.doc_matrix = None
+        n_docs, n_terms = self.doc_vectors.shape
+        if (self.ann is None and self.doc_int8 is None
+                and n_docs <= DENSE_MAX_DOCS and n_docs * n_terms <= DENSE_MAX_CELLS):
+            self.doc_matrix = np.ascontiguousarray(self.doc_vectors.toarray())
+        # Sparse path: column j of the CSC copy is term j's postings list with its
+        # weights, so a query only touches the columns of its own terms
+        self.doc_csc = None
+        if self.ann is None and self.doc_matrix is None:
+            self.doc_csc = (self.doc_int8 if self.doc_int8 is not None else self.doc_vectors).tocsc()
+        # Real query streams repeat a few prompts a lot; cache per normalised query
+        self._cached_retrieve = functools.lru_cache(maxsize=QUERY_CACHE_SIZE)(self._retrieve)
+
+    def _fit(self):
+        """Fit TF-IDF over the corpus; returns (tfidf, columns, doc_vectors)"""
+        hashed = self.hasher.transform(self.contents)
+        self.columns = np.unique(hashed.indices)
+        self._build_column_map()
+        tfidf = TfidfTransformer()
+        # Unit-length rows turn cosine similarity into a plain dot product
+        doc_vectors = normalize(tfidf.fit_transform(self._compact(hashed)), norm='l2', copy=False)
+        return tfidf, self.columns, doc_vectors
+
+    def _load_or_fit(self):
+        """Reuse fitted state from the on-disk cache, refitting if it is missing or unreadable"""
+        # Everything the fitted columns and IDF depend on: hasher settings, sklearn, corpus
+        params = repr(sorted(self.hasher.get_params().items()))
+        key = hashlib.sha1('\0'.join([params, sklearn.__version__,
+                                      *self.contents]).encode()).hexdigest()[:16]
+        path = CACHE_DIR / f'{key}.joblib'
+        try:
+            tfidf, self.columns, doc_vectors = joblib.load(path)
+            self._build_column_map()
+            return tfidf, self.columns, doc_vectors
+        except Exception:
+            pass
+
+        fitted = self._fit()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            joblib.dump(fitted, path)
+        except OSError:
+            pass  # read-only home: keep working without the cache
+        return fitted
+
+    def _build_column_map(self):
+        self._column_map = np.full(HASH_FEATURES, -1, dtype=np.int32)
+        self._column_map[self.columns] = np.arange(self.columns.size, dtype=np.int32)
+
+    def _compact(self, hashed):
+        """Renumber hashed columns onto the corpus's buckets, dropping the rest"""
+        rows = np.repeat(np.arange(hashed.shape[0]), np.diff(hashed.indptr))
+        cols = self._column_map[hashed.indices]
+        keep = cols >= 0
+        return sp.csr_matrix((hashed.data[keep], (rows[keep], cols[keep])),
+                             shape=(hashed.shape[0], self.columns.size))
+
+    def vectorize(self, texts):
+        """L2-normalised TF-IDF rows for texts, in the document column space"""
+        return self.tfidf.transform(self._compact(self.hasher.transform(texts)))
+
     def load_trading_knowledge(self):
         """Load free trading education content"""
         # You can populate this with free trading resources
@@ -17,20 +152,94 @@ class TradingRAG:
             {"topic": "Risk Management", "content": "Never risk more than 2% of portfolio on single trade..."},
             # Add more free trading knowledge
         ]
-        return pd.DataFrame(knowledge)
-    
+        return [d['topic'] for d in knowledge], [d['content'] for d in knowledge]
+
+    def build_ann_index(self):
+        """Build an HNSW index over the document vectors, densifying a slice of rows at a time"""
+        n, dim = self.doc_vectors.shape
+        index = hnswlib.Index(space='cosine', dim=dim)
+        index.init_index(max_elements=n, M=16, ef_construction=200)
+        # Each slice stays within the dense path's memory bound
+        step = max(1, DENSE_MAX_CELLS // max(dim, 1))
+        for start in range(0, n, step):
+            stop = min(start + step, n)
+            index.add_items(self.doc_vectors[start:stop].toarray(), ids=np.arange(start, stop))
+        index.set_ef(ANN_EF)
+        return index
+
+    def score_documents(self, query_vectors):
+        """Cosine similarity of each normalised query row to every document (M x N).
+
+        Dense path only; sparse and int8 corpora are scored by _rank_candidates.
+        """
+        # Rows are unit length, so this sgemv/sgemm is the whole cosine
+        return query_vectors.toarray() @ self.doc_matrix.T
+
     def retrieve_relevant_info(self, query, top_k=3):
         """Find relevant trading knowledge for user query"""
-        query_vector = self.vectorizer.transform([query])
-        similarities = cosine_similarity(query_vector, self.doc_vectors).flatten()
-        top_indices = similarities.argsort()[-top_k:][::-1]
-        
-        relevant_docs = []
-        for idx in top_indices:
-            if similarities[idx] > 0.1:  # Minimum similarity threshold
-                relevant_docs.append({
-                    'topic': self.knowledge_base.iloc[idx]['topic'],
-                    'content': self.knowledge_base.iloc[idx]['content'],
-                    'similarity': similarities[idx]
-                })
-        return relevant_docs
+        # The hasher lowercases anyway, so this key never merges distinct queries
+        return list(self._cached_retrieve(query.strip().lower(), top_k))
+
+    def retrieve_relevant_info_batch(self, queries, top_k=3):
+        """Retrieve for many queries with one transform and one matrix product"""
+        return [list(hits) for hits in self._search(queries, top_k)]
+
+    def _retrieve(self, query, top_k):
+        """Uncached single-query retrieval; returns a tuple so the cached value can't be changed"""
+        return self._search([query], top_k)[0]
+
+    def _rank_candidates(self, query_vector, top_k):
+        """Top-k (indices, similarities) accumulated one query term column at a time"""
+        csc = self.doc_csc
+        scores = np.zeros(csc.shape[0], dtype=np.float32)
+        if _accumulate_columns_jit is not None:
+            # One compiled loop over the postings, no per-term Python or temporaries
+            _accumulate_columns_jit(csc.indptr, csc.indices, csc.data,
+                                    query_vector.indices, query_vector.data, scores)
+        else:
+            for j, weight in zip(query_vector.indices, query_vector.data):
+                start, end = csc.indptr[j], csc.indptr[j + 1]
+                scores[csc.indices[start:end]] += weight * csc.data[start:end]
+        if self.doc_int8 is not None:
+            scores /= np.float32(self.int8_scale)
+        top = _top_k(scores, top_k)
+        return top, scores[top]
+
+    def _search(self, queries, top_k):
+        """Top-k Hits above the similarity threshold for each query, as tuples"""
+        query_vectors = self.vectorize(queries)
+        if self.ann is not None:
+            labels, distances = self.ann.knn_query(query_vectors.toarray(),
+                                                   k=min(top_k, len(self.topics)))
+            ranked = zip(labels, 1 - distances)
+        elif self.doc_csc is not None:
+            ranked = (self._rank_candidates(query_vector, top_k) for query_vector in query_vectors)
+        else:
+            similarities = self.score_documents(query_vectors)
+            top = [_top_k(row, top_k) for row in similarities]
+            ranked = ((indices, row[indices]) for indices, row in zip(top, similarities))
+
+        results = []
+        for top_indices, top_similarities in ranked:
+            keep = top_similarities > 0.1  # Minimum similarity threshold
+            indices = top_indices[keep]
+            results.append(tuple(map(Hit, self._topic_array[indices], self._content_array[indices],
+                                     top_similarities[keep].tolist())))
+        return results
+
+_instance = None
+_instance_lock = threading.Lock()
+
+def get_trading_rag():
+    """The process-wide TradingRAG, built on first use.
+
+    The instance is never mutated after __init__ (its query cache is an
+    lru_cache, which is thread-safe), so every session and thread can share
+    it. The lock keeps concurrent first calls from fitting twice.
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = TradingRAG()
+    return _instance